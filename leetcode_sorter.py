@@ -1,15 +1,50 @@
 import requests
+from requests.adapters import HTTPAdapter
+import urllib3
 import json
 import os
 import time
 import math
 import csv
+import gzip
+import hashlib
+import heapq
+import operator
+import zlib
+from dataclasses import dataclass
+
+try:
+    import orjson # Optional: much faster JSON parsing/serialization
+except ImportError:
+    orjson = None
+
+try:
+    import ujson # Optional: faster JSON fallback when orjson is not installed
+except ImportError:
+    ujson = None
+
+try:
+    import numpy as np # Optional: vectorized score calculation
+except ImportError:
+    np = None
+
+try:
+    import ijson # Optional: incremental API response parsing for low-memory environments
+except ImportError:
+    ijson = None
 
 # --- Configuration ---
-CACHE_FILE = "leetcode_problems_cache.json" # Cache filename for API responses
+CACHE_FILE = "leetcode_problems_cache.json.gz" # Gzip-compressed cache filename for API responses
+LEGACY_CACHE_FILE = "leetcode_problems_cache.json" # Uncompressed cache of older versions, read if CACHE_FILE is missing
+CACHE_COMPRESS_LEVEL = 1 # Fastest gzip level; JSON still compresses well
 CACHE_EXPIRY_DAYS = 1  # How old the cache can be before refreshing
 OUTPUT_CSV_FILE = "leetcode_sorted_problems.csv" # Output filename for sorted problems
+TOP_N_DISPLAY = 20 # Number of hardest problems printed to the console
+SCORE_CACHE_FILE = "leetcode_scores_cache.npz" # Memoized scores from the last run (NumPy path only)
 LEETCODE_PROBLEMS_ALL_URL = "https://leetcode.com/api/problems/all/" # API endpoint
+PROBLEM_URL_TEMPLATE = "https://leetcode.com/problems/{slug}/" # Problem page URL, built only when exported
+REQUEST_TIMEOUT = (5, 30) # (connect, read) timeout in seconds for API requests
+STREAM_API_RESPONSE = os.environ.get("LEETCODE_STREAM") == "1" # Parse the API response incrementally (needs ijson)
 
 # --- SCORING SYSTEM ---
 
@@ -41,60 +76,213 @@ WEIGHTS = {
     "newness_premium": 70,
 }
 
-# Mapping from LeetCode API's numeric difficulty to string representation.
-DIFFICULTY_API_MAP = {
-    1: "Easy",
-    2: "Medium",
-    3: "Hard"
-}
+# LeetCode API's numeric difficulty level (1-3) to string representation; index 0 is unused.
+DIFFICULTY_NAMES = ("", "Easy", "Medium", "Hard")
+
+# Base scores indexed by numeric difficulty level, so scoring needs no string lookups.
+BASE_SCORE_BY_LEVEL = (0,) + tuple(DIFFICULTY_SCORE_BASE_MAP[name] for name in DIFFICULTY_NAMES[1:])
+
+# Console row layout for the top problems table (matches the header printed in main).
+ROW_FMT = "{id:<5} | {title:<40.38} | {difficulty:<6} | {acc:<5.1f} | {subs:<7.1f} | {acs:<7.1f} | {score:<8.2f}"
+
+# Shared HTTP session: keeps connections alive so repeated requests skip the TCP/TLS handshake.
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+_SESSION.headers.update({ # Standard headers to mimic a browser request
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Encoding': 'gzip, deflate', # requests decompresses transparently
+    'Referer': 'https://leetcode.com/problemset/all/', # Referer can sometimes be important
+})
+
+# --- Data Model ---
+
+@dataclass(slots=True)
+class Problem:
+    """A free LeetCode problem with the statistics used for scoring."""
+    id: int
+    title: str
+    slug: str
+    level: int # Numeric difficulty level, 1:E, 2:M, 3:H
+    totalAccepted: int
+    totalSubmissions: int
+    acceptanceRate: float
+    trueDifficultyScore: float | None = None # Filled in place once normalization maxima are known
+
+    @property
+    def difficulty(self):
+        """LeetCode's difficulty name, for display and export."""
+        return DIFFICULTY_NAMES[self.level]
+
+    @property
+    def url(self):
+        """Problem page URL, built on demand rather than stored for every problem."""
+        return PROBLEM_URL_TEMPLATE.format(slug=self.slug)
 
 # --- Helper Functions ---
 
-def fetch_problems_from_api_rest():
-    """Fetches all problem data from the LeetCode REST API."""
+def _load_json(raw):
+    """Parses JSON from bytes with the fastest available library (orjson, then ujson, then stdlib json)."""
+    if orjson:
+        return orjson.loads(raw)
+    if ujson:
+        return ujson.loads(raw)
+    return json.loads(raw)
+
+def _dump_json(obj):
+    """Serializes to compact UTF-8 JSON bytes with the fastest available library (orjson returns bytes already)."""
+    if orjson:
+        return orjson.dumps(obj)
+    if ujson:
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def _conditional_request_headers(stale_cache):
+    """Builds If-None-Match/If-Modified-Since headers from a stale cache entry's validators."""
+    headers = {}
+    if stale_cache:
+        if stale_cache.get('etag'):
+            headers['If-None-Match'] = stale_cache['etag']
+        if stale_cache.get('last_modified'):
+            headers['If-Modified-Since'] = stale_cache['last_modified']
+    return headers
+
+def _make_cache_entry(problems, response, raw=None):
+    """
+    Wraps freshly fetched problems with the fetch time and the response's cache validators.
+    'raw' keeps the response body as downloaded so it can be cached without re-serializing.
+    """
+    return {
+        "fetched_at": time.time(),
+        "etag": response.headers.get('ETag'),
+        "last_modified": response.headers.get('Last-Modified'),
+        "data": problems,
+        "raw": raw,
+    }
+
+def _revalidated_cache_entry(stale_cache, response):
+    """
+    Handles a 304 Not Modified answer: the stale entry is still current, so restart its expiry clock
+    and take over any updated validators the server sent with the 304.
+    """
+    print("Problem list not modified on server; reusing cached data.")
+    stale_cache['fetched_at'] = time.time()
+    if response.headers.get('ETag'):
+        stale_cache['etag'] = response.headers['ETag']
+    if response.headers.get('Last-Modified'):
+        stale_cache['last_modified'] = response.headers['Last-Modified']
+    return stale_cache
+
+def fetch_problems_from_api_rest(stale_cache=None):
+    """
+    Fetches all problem data from the LeetCode REST API and returns it as a cache entry.
+    If a stale cache entry is given, the request is conditional on its ETag/Last-Modified,
+    and a 304 Not Modified response returns that entry instead of downloading everything again.
+    """
     print(f"Fetching problems from LeetCode API: {LEETCODE_PROBLEMS_ALL_URL}")
+    if STREAM_API_RESPONSE:
+        if ijson:
+            return fetch_problems_from_api_stream(stale_cache)
+        print("LEETCODE_STREAM=1 is set but ijson is not installed; reading the full response instead.")
     try:
-        headers = { # Standard headers to mimic a browser request
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Referer': 'https://leetcode.com/problemset/all/', # Referer can sometimes be important
-        }
-        response = requests.get(LEETCODE_PROBLEMS_ALL_URL, headers=headers)
+        response = _SESSION.get(LEETCODE_PROBLEMS_ALL_URL, headers=_conditional_request_headers(stale_cache),
+                                timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304 and stale_cache:
+            return _revalidated_cache_entry(stale_cache, response)
         response.raise_for_status() # Raises HTTPError for bad responses (4XX or 5XX)
-        data = response.json()
+        # Parsing the whole buffer at once is faster than streaming; only stream when memory is tight.
+        data = _load_json(response.content)
         if "stat_status_pairs" in data: # Main list of problems
-            return data["stat_status_pairs"]
+            return _make_cache_entry(data["stat_status_pairs"], response, raw=response.content)
         print("API response structure unexpected: 'stat_status_pairs' not found.")
         return None
     except requests.exceptions.RequestException as e:
         print(f"API request failed: {e}")
         return None
-    except json.JSONDecodeError as e:
+    except ValueError as e: # The JSONDecodeError of json, orjson and ujson all subclass ValueError
+        print(f"Failed to parse API response JSON: {e}")
+        return None
+
+def fetch_problems_from_api_stream(stale_cache=None):
+    """
+    Low-memory variant of fetch_problems_from_api_rest (requires ijson).
+    Parses 'stat_status_pairs' straight from the response stream without buffering the whole body.
+    """
+    try:
+        with _SESSION.get(LEETCODE_PROBLEMS_ALL_URL, headers=_conditional_request_headers(stale_cache),
+                          timeout=REQUEST_TIMEOUT, stream=True) as response:
+            if response.status_code == 304 and stale_cache:
+                return _revalidated_cache_entry(stale_cache, response)
+            response.raise_for_status()
+            response.raw.decode_content = True # Let urllib3 undo the gzip/deflate encoding while streaming
+            problems = list(ijson.items(response.raw, 'stat_status_pairs.item', use_float=True))
+        if problems:
+            return _make_cache_entry(problems, response)
+        print("API response structure unexpected: 'stat_status_pairs' not found.")
+        return None
+    # Reading response.raw bypasses requests' exception wrapping, so a connection dropped or timed out
+    # mid-body surfaces as a urllib3 error rather than a RequestException.
+    except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+        print(f"API request failed: {e}")
+        return None
+    except ijson.JSONError as e:
         print(f"Failed to parse API response JSON: {e}")
         return None
 
 def load_problems_from_cache():
-    """Loads problems from a local cache file if it exists and is not expired."""
+    """
+    Loads the cache entry ({'fetched_at', 'etag', 'last_modified', 'data', 'raw'}) from the local cache file.
+    The file is one JSON header line followed by the API response body (see save_problems_to_cache).
+    Falls back to the uncompressed LEGACY_CACHE_FILE, including its older format holding only
+    the problem list, which uses the file mtime as fetch time.
+    Returns None if there is no readable cache; freshness is checked separately by is_cache_fresh.
+    """
     if os.path.exists(CACHE_FILE):
-        cache_mod_time = os.path.getmtime(CACHE_FILE)
-        # Check if cache is within expiry period
-        if (time.time() - cache_mod_time) < (CACHE_EXPIRY_DAYS * 24 * 60 * 60):
-            print(f"Loading problems from cache: {CACHE_FILE}")
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            print("Cache expired.")
+        path, opener = CACHE_FILE, gzip.open
+    elif os.path.exists(LEGACY_CACHE_FILE):
+        path, opener = LEGACY_CACHE_FILE, open
+    else:
+        return None
+    print(f"Loading problems from cache: {path}")
+    try:
+        with opener(path, 'rb') as f:
+            contents = f.read()
+        header_line, _, body = contents.partition(b'\n')
+        header = _load_json(header_line) if header_line.startswith(b'{"') else None
+        if isinstance(header, dict) and 'fetched_at' in header:
+            return {**header, "data": _load_json(body)["stat_status_pairs"], "raw": body}
+        cached = _load_json(contents)
+    # EOFError: truncated gzip file; zlib.error: corrupt compressed data
+    except (OSError, EOFError, zlib.error, ValueError, KeyError, TypeError) as e:
+        print(f"Ignoring unreadable cache file {path}: {e}")
+        return None
+    if isinstance(cached, list): # Legacy format: bare problem list, no validators
+        return {"fetched_at": os.path.getmtime(path), "etag": None, "last_modified": None,
+                "data": cached, "raw": None}
+    print(f"Ignoring cache file {path} with unrecognized format.")
     return None
 
-def save_problems_to_cache(problems):
-    """Saves the fetched problem data to a local cache file."""
-    print(f"Saving {len(problems)} problems to cache: {CACHE_FILE}")
-    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(problems, f, indent=2) # Indent for readability
+def is_cache_fresh(cache):
+    """Checks whether a cache entry was fetched within the expiry period."""
+    return (time.time() - cache['fetched_at']) < (CACHE_EXPIRY_DAYS * 24 * 60 * 60)
+
+def save_problems_to_cache(cache):
+    """
+    Saves a cache entry to the gzip-compressed cache file: a one-line JSON header with the fetch time
+    and validators, followed by the API response body exactly as downloaded (no re-serialization).
+    """
+    print(f"Saving {len(cache['data'])} problems to cache: {CACHE_FILE}")
+    header = {key: cache[key] for key in ("fetched_at", "etag", "last_modified")}
+    body = cache.get('raw')
+    if body is None: # Streamed responses and legacy caches have no raw body to reuse
+        body = _dump_json({"stat_status_pairs": cache['data']})
+    with gzip.open(CACHE_FILE, 'wb', compresslevel=CACHE_COMPRESS_LEVEL) as f:
+        f.write(_dump_json(header) + b'\n')
+        f.write(body)
 
 def process_problems(raw_problems_list):
     """
-    Filters and transforms raw problem data into a structured format.
+    Filters and transforms raw problem data into Problem records.
     Also collects maximum values for normalization purposes.
     """
     processed = []
@@ -113,35 +301,38 @@ def process_problems(raw_problems_list):
         if prob_data.get('paid_only', False): continue # Skip paid problems
 
         try:
-            frontend_id = int(stat.get('frontend_question_id', 0))
+            frontend_id = stat.get('frontend_question_id', 0)
             title = stat.get('question__title', 'N/A')
             slug = stat.get('question__title_slug', 'N/A')
-            total_accepted_val = int(stat.get('total_acs', 0))
-            total_submitted_val = int(stat.get('total_submitted', 0))
-            difficulty_level = int(difficulty_info.get('level', 0)) # 1:E, 2:M, 3:H
-
-            # Skip if core identifiers or difficulty are missing/invalid
-            if slug == 'N/A' or frontend_id == 0 or difficulty_level == 0: continue
+            total_accepted_val = stat.get('total_acs', 0)
+            total_submitted_val = stat.get('total_submitted', 0)
+            difficulty_level = difficulty_info.get('level', 0) # 1:E, 2:M, 3:H
+            # The API returns JSON numbers, which are already ints; only cast on the rare other value
+            # (a null still fails int() and is skipped with a warning below)
+            if not (type(frontend_id) is type(total_accepted_val) is type(total_submitted_val)
+                    is type(difficulty_level) is int):
+                frontend_id, total_accepted_val, total_submitted_val, difficulty_level = map(
+                    int, (frontend_id, total_accepted_val, total_submitted_val, difficulty_level))
+
+            # Skip if core identifiers are missing/invalid or difficulty level is not recognized
+            if slug == 'N/A' or frontend_id == 0 or not 0 < difficulty_level < len(DIFFICULTY_NAMES): continue
 
             acceptance_rate = (total_accepted_val / total_submitted_val) if total_submitted_val > 0 else 0.0
-            difficulty_str = DIFFICULTY_API_MAP.get(difficulty_level, "Unknown")
-            if difficulty_str == "Unknown": continue # Skip if difficulty level is not recognized
-
-            processed.append({
-                "id": frontend_id,
-                "title": title,
-                "slug": slug,
-                "difficulty": difficulty_str,
-                "totalAccepted": total_accepted_val,
-                "totalSubmissions": total_submitted_val,
-                "acceptanceRate": acceptance_rate,
-                "url": f"https://leetcode.com/problems/{slug}/"
-            })
+
+            processed.append(Problem(
+                id=frontend_id,
+                title=title,
+                slug=slug,
+                level=difficulty_level,
+                totalAccepted=total_accepted_val,
+                totalSubmissions=total_submitted_val,
+                acceptanceRate=acceptance_rate
+            ))
 
             # Update max values for normalization
-            max_frontend_id = max(max_frontend_id, frontend_id)
-            max_submissions = max(max_submissions, total_submitted_val)
-            max_accepted = max(max_accepted, total_accepted_val)
+            if frontend_id > max_frontend_id: max_frontend_id = frontend_id
+            if total_submitted_val > max_submissions: max_submissions = total_submitted_val
+            if total_accepted_val > max_accepted: max_accepted = total_accepted_val
 
         except (TypeError, ValueError) as e: # Catch potential errors during data conversion
             print(f"Warning: Data parsing error for problem '{stat.get('question__title_slug', 'Unknown')}': {e}")
@@ -150,43 +341,140 @@ def process_problems(raw_problems_list):
     # Ensure max values are at least 1 to prevent division by zero during normalization
     return processed, max(1, max_frontend_id), max(1, max_submissions), max(1, max_accepted)
 
-def calculate_true_difficulty_score(problem, max_frontend_id, max_submissions_log, max_accepted_log):
-    """Calculates a composite 'true difficulty' score for a given problem."""
-    score = 0.0
-
-    # 1. Base Score from LeetCode's Stated Difficulty
-    score += DIFFICULTY_SCORE_BASE_MAP.get(problem['difficulty'], 0)
-
-    # --- Modifier Factors ---
-
-    # 2. Acceptance Rate Impact: (1.0 - acceptanceRate) gives 0 for 100% acc, 1 for 0% acc.
-    acceptance_factor = (1.0 - problem['acceptanceRate'])
-    score += acceptance_factor * WEIGHTS["acceptance_rate_impact"]
-
-    # 3. Low Total Accepted Penalty: Penalizes problems solved by very few.
-    #    Uses log1p for normalization to handle 0 counts and dampen large values.
-    if problem['totalAccepted'] >= 0 and max_accepted_log > 0:
-        # log_norm_accepted is ~0 for 0 solves, approaches 1 for max solves.
-        log_norm_accepted = math.log1p(problem['totalAccepted']) / max_accepted_log
-        # low_accepted_factor is ~1 for 0 solves, approaches 0 for max solves.
-        low_accepted_factor = (1.0 - log_norm_accepted)
-        score += low_accepted_factor * WEIGHTS["low_total_accepted_penalty"]
-
-    # 4. High Popularity (Total Submissions) Discount: Reduces score for highly submitted problems.
-    #    WEIGHTS["high_popularity_discount"] is negative.
-    if problem['totalSubmissions'] > 0 and max_submissions_log > 0:
-        # log_norm_submissions is ~0 for 0 subs, approaches 1 for max subs.
-        log_norm_submissions = math.log1p(problem['totalSubmissions']) / max_submissions_log
-        score += log_norm_submissions * WEIGHTS["high_popularity_discount"]
-
-    # 5. Newness Premium: Adds a premium for newer problems.
-    #    Normalized problem ID (0 for oldest, 1 for newest approx).
-    if max_frontend_id > 0 :
-        norm_id = problem['id'] / max_frontend_id
-        score += norm_id * WEIGHTS["newness_premium"]
-    
-    problem['trueDifficultyScore'] = round(score, 2) # Store the calculated score
-    return problem
+def make_score_function(max_frontend_id, max_submissions_log, max_accepted_log):
+    """
+    Builds the scalar 'true difficulty' scorer with base scores, weights and normalization maxima
+    baked in as literals. The expression is compiled once, so scoring a problem does no WEIGHTS
+    lookups and no guard branches (process_problems guarantees maxima of at least 1).
+    Returns a function taking a Problem and returning its score rounded to 2 decimals.
+    """
+    terms = [
+        # 1. Base Score from LeetCode's Stated Difficulty
+        f"{BASE_SCORE_BY_LEVEL!r}[p.level]",
+
+        # --- Modifier Factors ---
+
+        # 2. Acceptance Rate Impact: (1.0 - acceptanceRate) gives 0 for 100% acc, 1 for 0% acc.
+        f"(1.0 - p.acceptanceRate) * {WEIGHTS['acceptance_rate_impact']!r}",
+
+        # 3. Low Total Accepted Penalty: Penalizes problems solved by very few.
+        #    Uses log1p for normalization to handle 0 counts and dampen large values;
+        #    the factor is ~1 for 0 solves and approaches 0 for max solves.
+        f"(1.0 - log1p(p.totalAccepted) / {max_accepted_log!r}) * {WEIGHTS['low_total_accepted_penalty']!r}",
+
+        # 4. High Popularity (Total Submissions) Discount: Reduces score for highly submitted problems.
+        #    WEIGHTS["high_popularity_discount"] is negative; log1p(0) == 0, so 0 subs get no discount.
+        f"log1p(p.totalSubmissions) / {max_submissions_log!r} * {WEIGHTS['high_popularity_discount']!r}",
+
+        # 5. Newness Premium: Adds a premium for newer problems.
+        #    Normalized problem ID (0 for oldest, 1 for newest approx).
+        f"p.id / {max_frontend_id!r} * {WEIGHTS['newness_premium']!r}",
+    ]
+    # log1p and round are bound as defaults so each call uses fast local loads, not global lookups
+    source = f"lambda p, log1p=log1p, round=round: round({' + '.join(terms)}, 2)"
+    return eval(compile(source, '<true_difficulty_score>', 'eval'), {'log1p': math.log1p, 'round': round})
+
+def _score_kernel_numpy(base, acc, accepted, subs, ids, max_id, max_subs_log, max_acs_log,
+                        w_acc, w_low, w_pop, w_new):
+    """NumPy scoring kernel, used when numba is not installed; same terms as make_score_function."""
+    # log1p(0) == 0, so problems without submissions get no popularity discount.
+    return (base
+            + (1.0 - acc) * w_acc
+            + (1.0 - np.log1p(accepted) / max_acs_log) * w_low
+            + np.log1p(subs) / max_subs_log * w_pop
+            + ids / max_id * w_new)
+
+_score_kernel = None # Set by get_score_kernel on first use
+
+def get_score_kernel():
+    """
+    Returns the scoring kernel, compiled with numba on first use if it is installed.
+    Importing numba and compiling are deferred so runs that never score (e.g. memoized scores) skip them.
+    """
+    global _score_kernel
+    if _score_kernel is not None:
+        return _score_kernel
+    try:
+        from numba import njit, prange # Optional: compiled scoring kernel
+    except ImportError:
+        _score_kernel = _score_kernel_numpy
+        return _score_kernel
+
+    @njit(cache=True, parallel=True, fastmath=True)
+    def score_kernel(base, acc, accepted, subs, ids, max_id, max_subs_log, max_acs_log,
+                     w_acc, w_low, w_pop, w_new):
+        """Scores every problem in a single fused, parallel loop (no intermediate arrays)."""
+        n = base.shape[0]
+        score = np.empty(n, dtype=np.float64)
+        for i in prange(n):
+            score[i] = (base[i]
+                        + (1.0 - acc[i]) * w_acc
+                        + (1.0 - math.log1p(accepted[i]) / max_acs_log) * w_low
+                        + math.log1p(subs[i]) / max_subs_log * w_pop
+                        + ids[i] / max_id * w_new)
+        return score
+
+    _score_kernel = score_kernel
+    return _score_kernel
+
+def calculate_true_difficulty_scores(problems, max_frontend_id, max_submissions_log, max_accepted_log):
+    """
+    Vectorized equivalent of make_score_function's scorer for a whole problem list (requires NumPy).
+    Builds one column per statistic and returns an array of rounded scores in the same order.
+    """
+    n = len(problems)
+    levels = np.fromiter((p.level for p in problems), dtype=np.int8, count=n)
+    base = np.asarray(BASE_SCORE_BY_LEVEL, dtype=np.float64)[levels] # Gather base score by level
+    acceptance = np.fromiter((p.acceptanceRate for p in problems), dtype=np.float64, count=n)
+    accepted = np.fromiter((p.totalAccepted for p in problems), dtype=np.float64, count=n)
+    submissions = np.fromiter((p.totalSubmissions for p in problems), dtype=np.float64, count=n)
+    ids = np.fromiter((p.id for p in problems), dtype=np.float64, count=n)
+
+    # Scalars are passed as floats so every call reuses one compiled (and disk-cached) signature
+    score = get_score_kernel()(base, acceptance, accepted, submissions, ids,
+                               float(max_frontend_id), float(max_submissions_log), float(max_accepted_log),
+                               float(WEIGHTS["acceptance_rate_impact"]), float(WEIGHTS["low_total_accepted_penalty"]),
+                               float(WEIGHTS["high_popularity_discount"]), float(WEIGHTS["newness_premium"]))
+    return np.round(score, 2)
+
+def top_score_indices(scores, n):
+    """Indices of the n highest scores, highest first, without sorting the whole array."""
+    n = min(n, len(scores))
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    # argpartition may pick any of the entries tied at the cutoff, so select by threshold instead:
+    # everything above the n-th highest score, then the lowest-index entries equal to it.
+    threshold = -np.partition(-scores, n - 1)[n - 1]
+    above = np.flatnonzero(scores > threshold)
+    tied = np.flatnonzero(scores == threshold)[:n - len(above)]
+    top = np.concatenate((above, tied))
+    return top[np.lexsort((top, -scores[top]))] # By score, ties in original order (as a stable sort)
+
+def score_cache_key(max_frontend_id, max_submissions, max_accepted, fetched_at):
+    """Identifies one scoring run: changes with the scoring config, the normalization maxima or the fetched data."""
+    config = json.dumps({"base": DIFFICULTY_SCORE_BASE_MAP, "weights": WEIGHTS}, sort_keys=True)
+    inputs = f"{max_frontend_id},{max_submissions},{max_accepted},{fetched_at!r}"
+    return hashlib.blake2b((config + inputs).encode(), digest_size=8).hexdigest()
+
+def load_scores_from_cache(key, ids):
+    """Returns the memoized score array if it was computed for the same key and problem order, else None."""
+    if not os.path.exists(SCORE_CACHE_FILE):
+        return None
+    try:
+        with np.load(SCORE_CACHE_FILE) as cached:
+            if str(cached['key']) == key and np.array_equal(cached['ids'], ids):
+                print(f"Loading scores from cache: {SCORE_CACHE_FILE}")
+                return cached['scores']
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring unreadable score cache {SCORE_CACHE_FILE}: {e}")
+    return None
+
+def save_scores_to_cache(key, ids, scores):
+    """Memoizes the score array (with the problem ids it is aligned to) for the next run."""
+    try:
+        np.savez(SCORE_CACHE_FILE, key=np.array(key), ids=ids, scores=scores)
+    except OSError as e:
+        print(f"Warning: could not save score cache {SCORE_CACHE_FILE}: {e}")
 
 # --- Main Execution Logic ---
 def main():
@@ -194,15 +482,20 @@ def main():
     print("=" * 40)
 
     # Attempt to load problems from cache first
-    raw_problems_list = load_problems_from_cache()
-    if not raw_problems_list: # If cache miss or expired
-        fetched_data = fetch_problems_from_api_rest()
-        if fetched_data:
-            save_problems_to_cache(fetched_data)
-            raw_problems_list = fetched_data
+    cache = load_problems_from_cache()
+    if not (cache and is_cache_fresh(cache)): # If cache miss or expired (an expired cache is revalidated)
+        if cache:
+            print("Cache expired.")
+        fetched = fetch_problems_from_api_rest(cache)
+        if fetched:
+            save_problems_to_cache(fetched)
+            cache = fetched
+        elif cache: # Refresh failed (e.g. network down), but stale data beats none
+            print("Warning: failed to refresh problems; using stale cache.")
         else:
             print("Failed to fetch problems and no cache available. Exiting.")
             return
+    raw_problems_list = cache['data']
 
     if not raw_problems_list: # Should not happen if fetch was successful
         print("No problem data found. Exiting.")
@@ -223,26 +516,56 @@ def main():
     max_submissions_log_val = math.log1p(max_subs) if max_subs > 0 else 1.0
     max_accepted_log_val = math.log1p(max_acs) if max_acs > 0 else 1.0
 
-    # Calculate true difficulty score for each problem
-    scored_problems = []
-    for problem in problems:
-        scored_problems.append(calculate_true_difficulty_score(
-            problem, max_id, max_submissions_log_val, max_accepted_log_val
-        ))
-
-    # Sort problems by the calculated score in descending order (hardest first)
-    sorted_problems = sorted(scored_problems, key=lambda p: p['trueDifficultyScore'], reverse=True)
+    if np is not None:
+        # Score all problems at once, then sort by descending score (hardest first).
+        # A stable sort keeps ties in the same order as the pure-Python path below.
+        # Scores are memoized, so re-runs on the same data and config skip the calculation.
+        ids = np.fromiter((p.id for p in problems), dtype=np.int64, count=len(problems))
+        key = score_cache_key(max_id, max_subs, max_acs, cache['fetched_at'])
+        scores = load_scores_from_cache(key, ids)
+        if scores is None:
+            scores = calculate_true_difficulty_scores(problems, max_id, max_submissions_log_val, max_accepted_log_val)
+            save_scores_to_cache(key, ids, scores)
+        # The full ranking is only needed for the CSV export; the console shows just the top rows.
+        if OUTPUT_CSV_FILE:
+            order = np.argsort(-scores, kind='stable')
+        else:
+            order = top_score_indices(scores, TOP_N_DISPLAY)
+        # Fill scores in place, only for the records that are actually output
+        sorted_problems = []
+        for i, score in zip(order.tolist(), scores[order].tolist()):
+            problem = problems[i]
+            problem.trueDifficultyScore = score
+            sorted_problems.append(problem)
+    else:
+        # Calculate true difficulty score for each problem, filling the records in place
+        score = make_score_function(max_id, max_submissions_log_val, max_accepted_log_val)
+        for problem in problems:
+            problem.trueDifficultyScore = score(problem)
+
+        # Sort problems by the calculated score in descending order (hardest first).
+        # Without a CSV export only the top rows are shown, so a heap selection is enough.
+        score_key = operator.attrgetter('trueDifficultyScore')
+        if OUTPUT_CSV_FILE:
+            sorted_problems = sorted(problems, key=score_key, reverse=True)
+        else:
+            sorted_problems = heapq.nlargest(TOP_N_DISPLAY, problems, key=score_key)
 
     # --- Output Results ---
-    print("\n--- Top 20 Hardest Problems (Calculated Score) ---")
+    print(f"\n--- Top {TOP_N_DISPLAY} Hardest Problems (Calculated Score) ---")
     # Header for console output
     print(f"{'ID':<5} | {'Title':<40} | {'LDiff':<6} | {'Acc%':<5} | {'Subs(k)':<7} | {'Acs(k)':<7} | {'Score':<8}")
     print("-" * 100) # Separator line
-    for p in sorted_problems[:20]: # Display top 20
-        acc_rate_str = f"{p['acceptanceRate']*100:.1f}"
-        subs_str = f"{p['totalSubmissions']/1000:.1f}" # Submissions in thousands
-        acs_str = f"{p['totalAccepted']/1000:.1f}"     # Accepted in thousands
-        print(f"{p['id']:<5} | {p['title'][:38]:<40} | {p['difficulty']:<6} | {acc_rate_str:<5} | {subs_str:<7} | {acs_str:<7} | {p['trueDifficultyScore']:<8.2f}")
+    for p in sorted_problems[:TOP_N_DISPLAY]: # Display top N
+        print(ROW_FMT.format_map({
+            'id': p.id,
+            'title': p.title,
+            'difficulty': p.difficulty,
+            'acc': p.acceptanceRate * 100,
+            'subs': p.totalSubmissions / 1000, # Submissions in thousands
+            'acs': p.totalAccepted / 1000,     # Accepted in thousands
+            'score': p.trueDifficultyScore,
+        }))
 
     # Export all sorted problems to a CSV file
     if OUTPUT_CSV_FILE:
@@ -252,16 +575,16 @@ def main():
             'totalAccepted', 'totalSubmissions', 'trueDifficultyScore', 'url'
         ]
         try:
-            with open(OUTPUT_CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for p_dict in sorted_problems:
-                    # Prepare a row dictionary, ensuring only specified fieldnames are written
-                    row_to_write = {key: p_dict.get(key) for key in fieldnames}
-                    # Format acceptance rate for CSV
-                    if isinstance(row_to_write['acceptanceRate'], (float, int)):
-                         row_to_write['acceptanceRate'] = f"{row_to_write['acceptanceRate']*100:.2f}%"
-                    writer.writerow(row_to_write)
+            # Build plain row tuples up front and write them in one call (no per-row dicts)
+            rows = [
+                (p.id, p.title, p.difficulty, f"{p.acceptanceRate*100:.2f}%",
+                 p.totalAccepted, p.totalSubmissions, p.trueDifficultyScore, p.url)
+                for p in sorted_problems
+            ]
+            with open(OUTPUT_CSV_FILE, 'w', newline='', encoding='utf-8', buffering=1 << 20) as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(fieldnames)
+                writer.writerows(rows)
             print(f"Successfully exported to {OUTPUT_CSV_FILE}")
         except IOError as e:
             print(f"Error writing CSV file: {e}")